@@ -21,7 +21,6 @@
 import bpy
 from bpy.types import SpaceView3D
 import gpu
-from gpu_extras.batch import batch_for_shader
 
 try:
     import imgui
@@ -31,9 +30,13 @@ from imgui.integrations.base import BaseOpenGLRenderer
 
 import numpy as np
 import ctypes as C
+import itertools
 
 class BlenderImguiRenderer(BaseOpenGLRenderer):
     """Integration of ImGui into Blender."""
+    # Type of the indices in imgui's draw lists
+    INDEX_DTYPE = np.uint16 if imgui.INDEX_SIZE == 2 else np.uint32
+
     VERTEX_SHADER_SRC = """
         void main() {
             Frag_UV = UV;
@@ -66,6 +69,10 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
         }
         """
 
+    # Draw commands sharing a clip rect may be grouped by texture, which
+    # changes the order in which overlapping commands are drawn, hence opt-in.
+    allow_cmd_reorder = False
+
     def __init__(self):
         self._shader_handle = None
         self._vert_handle = None
@@ -82,23 +89,48 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
         self._vao_handle = None
 
         self._texture : gpu.types.GPUTexture = None
+        self._fonts_dirty = True
+
+        # Reused from frame to frame to widen 16 bit indices
+        self._index_scratch = None
+
+        # Projection matrix, only rebuilt when the display size changes
+        self._last_display_size = None
+        self._ortho_projection = None
+
+        # GPUBatch.draw_range is not available in older versions of Blender
+        self._has_draw_range = hasattr(gpu.types.GPUBatch, "draw_range")
 
         super().__init__()
 
+    def mark_fonts_dirty(self):
+        """Must be called after changing io.fonts for the next call to
+        refresh_font_texture() to actually rebuild the atlas."""
+        self._fonts_dirty = True
+
     def refresh_font_texture(self):
-        self.io.fonts.add_font_default()
-        self.io.fonts.get_tex_data_as_rgba32()
+        if not self._fonts_dirty and self._texture is not None:
+            return
+
+        if self._texture is None:
+            # Only on the first build, later rebuilds keep the fonts as they are
+            self.io.fonts.add_font_default()
 
         width, height, imgui_pixels = self.io.fonts.get_tex_data_as_rgba32()
 
-        pixels_float = np.frombuffer(imgui_pixels, dtype=np.uint8)
-        pixels_float = pixels_float.astype('f') / 255.0
+        # Widen and scale in a single pass, without a temporary float array
+        pixels = np.frombuffer(imgui_pixels, dtype=np.uint8)
+        pixels_float = np.empty(pixels.shape, dtype=np.float32)
+        np.multiply(pixels, np.float32(1.0 / 255.0), out=pixels_float)
 
+        # Blender only accepts float buffers as texture data, but the texture
+        # itself is stored as 8 bit per channel, which is all the atlas holds.
         buffer = gpu.types.Buffer('FLOAT', 4 * width * height, pixels_float)
-        self._texture = gpu.types.GPUTexture(size=(width, height), data=buffer, format='RGBA32F')
+        self._texture = gpu.types.GPUTexture(size=(width, height), data=buffer, format='RGBA8')
 
         self.io.fonts.texture_id = self._texture
         self.io.fonts.clear_tex_data()
+        self._fonts_dirty = False
 
     def _create_device_objects(self):
         shader_info = gpu.types.GPUShaderCreateInfo()
@@ -118,6 +150,16 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
 
         shader = gpu.shader.create_from_info(shader_info)
         self._bl_shader = shader
+        # Resolve uniform locations once rather than by name at each frame.
+        # The sampler slot is fixed by the create info, no need to set it.
+        self._attrib_proj_mtx = shader.uniform_from_name("ProjMtx")
+
+        # Layout of the vertex buffers filled from imgui's draw lists
+        vertex_format = gpu.types.GPUVertFormat()
+        vertex_format.attr_add(id="Position", comp_type='F32', len=2, fetch_mode='FLOAT')
+        vertex_format.attr_add(id="UV", comp_type='F32', len=2, fetch_mode='FLOAT')
+        vertex_format.attr_add(id="Color", comp_type='U8', len=4, fetch_mode='INT_TO_FLOAT_UNIT')
+        self._vertex_format = vertex_format
         del shader_info
         del shader_vertex_outs
 
@@ -136,61 +178,156 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
 
         last_blend = gpu.state.blend_get()
 
-        gpu.state.blend_set('ALPHA')
+        # Local names for what is used in the per-command loop
+        scissor_set = gpu.state.scissor_set
+        uniform_sampler = shader.uniform_sampler
+        has_draw_range = self._has_draw_range
+
+        if last_blend != 'ALPHA':
+            gpu.state.blend_set('ALPHA')
         gpu.state.face_culling_set('NONE')
         gpu.state.scissor_test_set(True)
 
         gpu.state.viewport_set(0, 0, int(fb_width), int(fb_height))
 
-        ortho_projection = (
-             2.0/display_width, 0.0,                   0.0, 0.0,
-             0.0,               2.0/-display_height,   0.0, 0.0,
-             0.0,               0.0,                  -1.0, 0.0,
-            -1.0,               1.0,                   0.0, 1.0
-        )
         shader.bind()
-        shader.uniform_float("ProjMtx", ortho_projection)
-        shader.uniform_int("Texture", 0)
-
+        # Uniform values are kept by the shader between frames
+        display_size = (display_width, display_height)
+        if display_size != self._last_display_size:
+            self._ortho_projection = gpu.types.Buffer('FLOAT', 16, (
+                 2.0/display_width, 0.0,                   0.0, 0.0,
+                 0.0,               2.0/-display_height,   0.0, 0.0,
+                 0.0,               0.0,                  -1.0, 0.0,
+                -1.0,               1.0,                   0.0, 1.0
+            ))
+            self._last_display_size = display_size
+            shader.uniform_vector_float(self._attrib_proj_mtx, self._ortho_projection, 16)
+
+        # The sampler binding survives from one command list to the next,
+        # so the font atlas is typically bound once per frame.
+        last_texture_id = None
+        last_scissor_box = None
         for commands in draw_data.commands_lists:
-            size = commands.idx_buffer_size * imgui.INDEX_SIZE // 4
+            # Wrap imgui's buffers without copying them
+            size = commands.idx_buffer_size * imgui.INDEX_SIZE
             address = commands.idx_buffer_data
-            ptr = C.cast(address, C.POINTER(C.c_int))
-            idx_buffer_np = np.ctypeslib.as_array(ptr, shape=(size,))
-
-            size = commands.vtx_buffer_size * imgui.VERTEX_SIZE // 4
+            idx_buffer_np = np.frombuffer((C.c_ubyte * size).from_address(address), dtype=self.INDEX_DTYPE)
+            # GPUIndexBuf only accepts 32 bit indices, widen them once here
+            # (nothing to do when imgui already uses 32 bit indices).
+            if self.INDEX_DTYPE is not np.uint32:
+                n = idx_buffer_np.shape[0]
+                if self._index_scratch is None or self._index_scratch.shape[0] < n:
+                    # Leave some headroom so that growing UIs don't
+                    # reallocate at each frame.
+                    self._index_scratch = np.empty(2 * n, dtype=np.uint32)
+                np.copyto(self._index_scratch[:n], idx_buffer_np)
+                idx_buffer_np = self._index_scratch[:n]
+
+            size = commands.vtx_buffer_size * imgui.VERTEX_SIZE
             address = commands.vtx_buffer_data
-            ptr = C.cast(address, C.POINTER(C.c_float))
-            vtx_buffer_np = np.ctypeslib.as_array(ptr, shape=(size,))
+            vtx_buffer_np = np.frombuffer((C.c_ubyte * size).from_address(address), dtype=np.float32)
             vtx_buffer_shaped = vtx_buffer_np.reshape(-1, imgui.VERTEX_SIZE // 4)
 
+            # Vertex data is shared by all the commands of a list, only the
+            # index range changes from one command to the other.
+            vertices = vtx_buffer_shaped[:, :2]
+            uvs = vtx_buffer_shaped[:, 2:4]
+            # Packed RGBA8 colors, normalized by the vertex fetch
+            colors = vtx_buffer_shaped.view(np.uint8)[:, 4 * 4:4 * 5]
+
+            # Upload vertices once for the whole list
+            vbo = gpu.types.GPUVertBuf(self._vertex_format, len=vtx_buffer_shaped.shape[0])
+            vbo.attr_fill("Position", vertices)
+            vbo.attr_fill("UV", uvs)
+            vbo.attr_fill("Color", colors)
+
+            if has_draw_range:
+                ibo = gpu.types.GPUIndexBuf(type='TRIS', seq=idx_buffer_np.reshape(-1, 3))
+                draw_range = gpu.types.GPUBatch(type='TRIS', buf=vbo, elem=ibo).draw_range
+            else:
+                # Older Blender: one small index buffer per command, but
+                # still sharing the vertex buffer uploaded above.
+                def draw_range(shader, elem_start, elem_count):
+                    indices = idx_buffer_np[elem_start:elem_start + elem_count]
+                    ibo = gpu.types.GPUIndexBuf(type='TRIS', seq=indices.reshape(-1, 3))
+                    gpu.types.GPUBatch(type='TRIS', buf=vbo, elem=ibo).draw(shader)
+
+            if self.allow_cmd_reorder:
+                for texture_id, scissor_box, elem_start, elem_count in self._reordered_ranges(commands, fb_height):
+                    if scissor_box != last_scissor_box:
+                        scissor_set(*scissor_box)
+                        last_scissor_box = scissor_box
+                    if texture_id is not last_texture_id:
+                        uniform_sampler("Texture", texture_id)
+                        last_texture_id = texture_id
+                    draw_range(shader, elem_start=elem_start, elem_count=elem_count)
+                continue
+
             idx_buffer_offset = 0
             for command in commands.commands:
-                x, y, z, w = command.clip_rect
-                gpu.state.scissor_set(int(x), int(fb_height - w), int(z - x), int(w - y))
-
-                vertices = vtx_buffer_shaped[:, :2]
-                uvs = vtx_buffer_shaped[:, 2:4]
-                colors = vtx_buffer_shaped.view(np.uint8)[:, 4 * 4:]
-                colors = colors.astype('f') / 255.0
-
-                indices = idx_buffer_np[idx_buffer_offset:idx_buffer_offset + command.elem_count]
+                elem_count = command.elem_count
+                if elem_count == 0:
+                    continue
 
-                shader.uniform_sampler("Texture", command.texture_id)
+                x, y, z, w = command.clip_rect
+                scissor_box = (int(x), int(fb_height - w), int(z - x), int(w - y))
+                # Consecutive commands often share the same clip rect
+                if scissor_box != last_scissor_box:
+                    scissor_set(*scissor_box)
+                    last_scissor_box = scissor_box
 
-                batch = batch_for_shader(shader, 'TRIS', {
-                    "Position": vertices,
-                    "UV": uvs,
-                    "Color": colors,
-                }, indices=indices)
-                batch.draw(shader)
+                # Most consecutive commands use the font atlas
+                texture_id = command.texture_id
+                if texture_id is not last_texture_id:
+                    uniform_sampler("Texture", texture_id)
+                    last_texture_id = texture_id
 
-                idx_buffer_offset += command.elem_count
+                draw_range(shader, elem_start=idx_buffer_offset, elem_count=elem_count)
+                idx_buffer_offset += elem_count
 
         # restore modified gpu state
-        gpu.state.blend_set(last_blend)
+        if last_blend != 'ALPHA':
+            gpu.state.blend_set(last_blend)
         gpu.state.scissor_test_set(False)
 
+    def _reordered_ranges(self, commands, fb_height):
+        """Return the (texture_id, scissor_box, elem_start, elem_count) ranges
+        to draw for a command list when allow_cmd_reorder is set. Within runs
+        of consecutive commands sharing a scissor box, commands are grouped
+        by texture, then adjacent ranges that end up contiguous are merged."""
+        ranges = []
+        idx_buffer_offset = 0
+        for command in commands.commands:
+            elem_count = command.elem_count
+            if elem_count > 0:
+                x, y, z, w = command.clip_rect
+                scissor_box = (int(x), int(fb_height - w), int(z - x), int(w - y))
+                ranges.append((command.texture_id, scissor_box, idx_buffer_offset, elem_count))
+            idx_buffer_offset += elem_count
+
+        # Only reorder within a scissor box, so that the stacking of
+        # different windows and popups is kept. Textures are ordered by
+        # first use in the run, and the sort is stable, so the result does
+        # not depend on where textures live in memory.
+        merged = []
+        for _, run in itertools.groupby(ranges, key=lambda r: r[1]):
+            run = list(run)
+            first_use = {}
+            for r in run:
+                first_use.setdefault(id(r[0]), len(first_use))
+            run.sort(key=lambda r: first_use[id(r[0])])
+
+            for r in run:
+                if merged:
+                    texture_id, scissor_box, elem_start, elem_count = merged[-1]
+                    if (r[0] is texture_id
+                            and r[1] == scissor_box
+                            and r[2] == elem_start + elem_count):
+                        merged[-1] = (texture_id, scissor_box, elem_start, elem_count + r[3])
+                        continue
+                merged.append(r)
+        return merged
+
     # Blender's GPU api seems to manage state fine enough,
     # or at least much better than with BGL.
     # Until proven otherwise, texture cleanup and state backup are removed.
@@ -206,24 +343,29 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
 class GlobalImgui:
     # Simple Singleton pattern, use GlobalImgui.get() rather
     # than creating your own instances of this calss
-    _instance = None
 
     @classmethod
     def get(cls):
-        if cls._instance is None:
-            cls._instance = GlobalImgui()
-        return cls._instance
+        # Kept for compatibility, the instance lives at module level
+        return _GLOBAL
 
     def __init__(self):
         self.imgui_ctx = None
 
     def init_imgui(self):
         self.imgui_ctx = imgui.create_context()
+        # Stable for the lifetime of the context. Do not switch to another
+        # imgui context without going through init_imgui() again.
+        self.io = imgui.get_io()
         self.imgui_backend = BlenderImguiRenderer()
         self.setup_key_map()
         self.draw_handlers = {}
         self.callbacks = {}
+        # Same callbacks, grouped by SpaceType then handle for draw()
+        self.callbacks_by_space = {}
         self.next_callback_id = 0
+        self._last_display_size = None
+        self._last_ui_scale = None
 
     def shutdown_imgui(self):
         for SpaceType, draw_handler in self.draw_handlers.items():
@@ -248,6 +390,7 @@ class GlobalImgui:
         self.next_callback_id += 1
 
         self.callbacks[handle] = (callback, SpaceType)
+        self.callbacks_by_space.setdefault(SpaceType, {})[handle] = callback
 
         return handle
 
@@ -256,28 +399,42 @@ class GlobalImgui:
             print(f"Error: invalid imgui callback handle: {handle}")
             return
 
-        del self.callbacks[handle]
+        _, SpaceType = self.callbacks.pop(handle)
+        space_callbacks = self.callbacks_by_space[SpaceType]
+        del space_callbacks[handle]
+        if not space_callbacks:
+            del self.callbacks_by_space[SpaceType]
         if not self.callbacks:
             self.shutdown_imgui()
 
     def draw(self, CurrentSpaceType):
+        # Don't build an empty frame when nothing is drawn in this space
+        callbacks = self.callbacks_by_space.get(CurrentSpaceType)
+        if not callbacks:
+            return
         context = bpy.context
         region = context.region
-        io = imgui.get_io()
-        io.display_size = region.width, region.height
-        io.font_global_scale = context.preferences.view.ui_scale
+        io = self.io
+        # Only forward to imgui what changed since the last frame
+        display_size = (region.width, region.height)
+        if display_size != self._last_display_size:
+            io.display_size = display_size
+            self._last_display_size = display_size
+        ui_scale = context.preferences.view.ui_scale
+        if ui_scale != self._last_ui_scale:
+            io.font_global_scale = ui_scale
+            self._last_ui_scale = ui_scale
         imgui.new_frame()
 
-        for cb, SpaceType in self.callbacks.values():
-            if SpaceType == CurrentSpaceType:
-                cb(context)
+        for cb in callbacks.values():
+            cb(context)
 
         imgui.end_frame()
         imgui.render()
         self.imgui_backend.render(imgui.get_draw_data())
 
     def setup_key_map(self):
-        io = imgui.get_io()
+        io = self.io
         keys = (
             imgui.KEY_TAB,
             imgui.KEY_LEFT_ARROW,
@@ -306,14 +463,16 @@ class GlobalImgui:
             io.key_map[k] = k
 
 
+_GLOBAL = GlobalImgui()
+
 # -------------------------------------------------------------------
 
 def imgui_handler_add(callback, SpaceType):
-    return GlobalImgui.get().handler_add(callback, SpaceType)
+    return _GLOBAL.handler_add(callback, SpaceType)
 
 
 def imgui_handler_remove(handle):
-    GlobalImgui.get().handler_remove(handle)
+    _GLOBAL.handler_remove(handle)
 
 
 # -------------------------------------------------------------------
@@ -349,12 +508,27 @@ class ImguiBasedOperator:
         'RIGHT_SHIFT': 128 + 6,
         'OSKEY': 128 + 7,
     }
+    # Resolved once here rather than at each event
+    _LEFT_CTRL = key_map['LEFT_CTRL']
+    _RIGHT_CTRL = key_map['RIGHT_CTRL']
+    _LEFT_ALT = key_map['LEFT_ALT']
+    _RIGHT_ALT = key_map['RIGHT_ALT']
+    _LEFT_SHIFT = key_map['LEFT_SHIFT']
+    _RIGHT_SHIFT = key_map['RIGHT_SHIFT']
+    _OSKEY = key_map['OSKEY']
+    _MOUSE_BUTTONS = {
+        'LEFTMOUSE': 0,
+        'RIGHTMOUSE': 1,
+        'MIDDLEMOUSE': 2,
+    }
 
     def init_imgui(self, context):
         self.imgui_handle = imgui_handler_add(self.draw, SpaceView3D)
 
     def shutdown_imgui(self):
         imgui_handler_remove(self.imgui_handle)
+        # The context may be destroyed with our handler, forget its io
+        self.imgui_io = None
 
     def draw(self, context):
         # This is where you can use any code from pyimgui's doc
@@ -363,18 +537,17 @@ class ImguiBasedOperator:
 
     def modal_imgui(self, context, event):
         region = context.region
-        io = imgui.get_io()
+        # The io object is stable for the lifetime of the imgui context,
+        # fetch it on the first event only.
+        io = getattr(self, "imgui_io", None)
+        if io is None:
+            io = self.imgui_io = imgui.get_io()
 
         io.mouse_pos = (event.mouse_region_x, region.height - 1 - event.mouse_region_y)
 
-        if event.type == 'LEFTMOUSE':
-            io.mouse_down[0] = event.value == 'PRESS'
-
-        elif event.type == 'RIGHTMOUSE':
-            io.mouse_down[1] = event.value == 'PRESS'
-
-        elif event.type == 'MIDDLEMOUSE':
-            io.mouse_down[2] = event.value == 'PRESS'
+        button = self._MOUSE_BUTTONS.get(event.type)
+        if button is not None:
+            io.mouse_down[button] = event.value == 'PRESS'
 
         elif event.type == 'WHEELUPMOUSE':
             io.mouse_wheel = -1
@@ -385,28 +558,18 @@ class ImguiBasedOperator:
         # Enable this for debugging, otherwise it just floods the console and increases our memory footprint
         # print(f"Event type={event.type}, unicode={event.unicode}")
 
-        if event.type in self.key_map:
+        key = self.key_map.get(event.type)
+        if key is not None:
             if event.value == 'PRESS':
-                io.keys_down[self.key_map[event.type]] = True
+                io.keys_down[key] = True
             elif event.value == 'RELEASE':
-                io.keys_down[self.key_map[event.type]] = False
-
-        io.key_ctrl = (
-            io.keys_down[self.key_map['LEFT_CTRL']] or
-            io.keys_down[self.key_map['RIGHT_CTRL']]
-        )
-
-        io.key_alt = (
-            io.keys_down[self.key_map['LEFT_ALT']] or
-            io.keys_down[self.key_map['RIGHT_ALT']]
-        )
-
-        io.key_shift = (
-            io.keys_down[self.key_map['LEFT_SHIFT']] or
-            io.keys_down[self.key_map['RIGHT_SHIFT']]
-        )
+                io.keys_down[key] = False
 
-        io.key_super = io.keys_down[self.key_map['OSKEY']]
+        keys_down = io.keys_down
+        io.key_ctrl = keys_down[self._LEFT_CTRL] or keys_down[self._RIGHT_CTRL]
+        io.key_alt = keys_down[self._LEFT_ALT] or keys_down[self._RIGHT_ALT]
+        io.key_shift = keys_down[self._LEFT_SHIFT] or keys_down[self._RIGHT_SHIFT]
+        io.key_super = keys_down[self._OSKEY]
 
         if event.unicode:
             char = ord(event.unicode)
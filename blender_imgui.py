@@ -37,6 +37,8 @@ import ctypes as C
 
 class BlenderImguiRenderer(BaseOpenGLRenderer):
     """Integration of ImGui into Blender."""
+    # Type of the indices in imgui's draw lists
+    INDEX_DTYPE = np.uint16 if imgui.INDEX_SIZE == 2 else np.uint32
 
     VERTEX_SHADER_SRC = """
     uniform mat4 ProjMtx;
@@ -195,27 +197,31 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
         shader.uniform_int("Texture", 0)
         
         for commands in draw_data.commands_lists:
-            size = commands.idx_buffer_size * imgui.INDEX_SIZE // 4
+            # Wrap imgui's buffers without copying them
+            size = commands.idx_buffer_size * imgui.INDEX_SIZE
             address = commands.idx_buffer_data
-            ptr = C.cast(address, C.POINTER(C.c_int))
-            idx_buffer_np = np.ctypeslib.as_array(ptr, shape=(size,))
+            idx_buffer_np = np.frombuffer((C.c_ubyte * size).from_address(address), dtype=self.INDEX_DTYPE)
+            # GPUIndexBuf only accepts 32 bit indices, widen them once here
+            # (this is a no-op when imgui already uses 32 bit indices).
+            idx_buffer_np = idx_buffer_np.astype(np.uint32, copy=False)
             
-            size = commands.vtx_buffer_size * imgui.VERTEX_SIZE // 4
+            size = commands.vtx_buffer_size * imgui.VERTEX_SIZE
             address = commands.vtx_buffer_data
-            ptr = C.cast(address, C.POINTER(C.c_float))
-            vtx_buffer_np = np.ctypeslib.as_array(ptr, shape=(size,))
+            vtx_buffer_np = np.frombuffer((C.c_ubyte * size).from_address(address), dtype=np.float32)
             vtx_buffer_shaped = vtx_buffer_np.reshape(-1, imgui.VERTEX_SIZE // 4)
             
+            # Vertex data is shared by all the commands of a list, only the
+            # index range changes from one command to the other.
+            vertices = vtx_buffer_shaped[:,:2]
+            uvs = vtx_buffer_shaped[:,2:4]
+            colors = vtx_buffer_shaped.view(np.uint8)[:,4*4:]
+            colors = colors.astype('f') / 255.0
+            
             idx_buffer_offset = 0
             for command in commands.commands:
                 x, y, z, w = command.clip_rect
                 gl.glScissor(int(x), int(fb_height - w), int(z - x), int(w - y))
                 
-                vertices = vtx_buffer_shaped[:,:2]
-                uvs = vtx_buffer_shaped[:,2:4]
-                colors = vtx_buffer_shaped.view(np.uint8)[:,4*4:]
-                colors = colors.astype('f') / 255.0
-                
                 indices = idx_buffer_np[idx_buffer_offset:idx_buffer_offset+command.elem_count]
                 
                 gl.glBindTexture(gl.GL_TEXTURE_2D, command.texture_id)
@@ -285,24 +291,29 @@ class BlenderImguiRenderer(BaseOpenGLRenderer):
 class GlobalImgui:
     # Simple Singleton pattern, use GlobalImgui.get() rather
     # than creating your own instances of this calss
-    _instance = None
 
     @classmethod
     def get(cls):
-        if cls._instance is None:
-            cls._instance = GlobalImgui()
-        return cls._instance
+        # Kept for compatibility, the instance lives at module level
+        return _GLOBAL
 
     def __init__(self):
         self.imgui_ctx = None
 
     def init_imgui(self):
         self.imgui_ctx = imgui.create_context()
+        # Stable for the lifetime of the context. Do not switch to another
+        # imgui context without going through init_imgui() again.
+        self.io = imgui.get_io()
         self.imgui_backend = BlenderImguiRenderer()
         self.setup_key_map()
         self.draw_handlers = {}
         self.callbacks = {}
+        # Same callbacks, grouped by SpaceType then handle for draw()
+        self.callbacks_by_space = {}
         self.next_callback_id = 0
+        self._last_display_size = None
+        self._last_ui_scale = None
         
     def shutdown_imgui(self):
         for SpaceType, draw_handler in self.draw_handlers.items():
@@ -332,6 +343,7 @@ class GlobalImgui:
         self.next_callback_id += 1
 
         self.callbacks[handle] = (callback, SpaceType)
+        self.callbacks_by_space.setdefault(SpaceType, {})[handle] = callback
 
         return handle
 
@@ -340,7 +352,11 @@ class GlobalImgui:
             print(f"Error: invalid imgui callback handle: {handle}")
             return
 
-        del self.callbacks[handle]
+        _, SpaceType = self.callbacks.pop(handle)
+        space_callbacks = self.callbacks_by_space[SpaceType]
+        del space_callbacks[handle]
+        if not space_callbacks:
+            del self.callbacks_by_space[SpaceType]
         if not self.callbacks:
             self.shutdown_imgui()
 
@@ -377,22 +393,30 @@ class GlobalImgui:
         return False
 
     def draw(self, CurrentSpaceType):
-        if self.callbacks.values().__len__() == 0:
+        # Don't build an empty frame when nothing is drawn in this space
+        callbacks = self.callbacks_by_space.get(CurrentSpaceType)
+        if not callbacks:
             return
         if not self.returnTrueXAmountOfTimesPerSecondToCreateSolidFramerate(blender_imgui_global_framerate_cap):
             self.imgui_backend.render(imgui.get_draw_data())
             return
         context = bpy.context
         region = context.region
-        io = imgui.get_io()
-        io.display_size = region.width, region.height
-        io.font_global_scale = context.preferences.view.ui_scale
+        io = self.io
+        # Only forward to imgui what changed since the last frame
+        display_size = (region.width, region.height)
+        if display_size != self._last_display_size:
+            io.display_size = display_size
+            self._last_display_size = display_size
+        ui_scale = context.preferences.view.ui_scale
+        if ui_scale != self._last_ui_scale:
+            io.font_global_scale = ui_scale
+            self._last_ui_scale = ui_scale
         # imgui.render()
         # imgui.end_frame()
         imgui.new_frame()
-        for cb, SpaceType in self.callbacks.values():
-            if SpaceType == CurrentSpaceType:
-                cb(context)
+        for cb in callbacks.values():
+            cb(context)
     
         imguiFlags = (
             imgui.WINDOW_NO_RESIZE
@@ -411,7 +435,7 @@ class GlobalImgui:
         self.imgui_backend.render(imgui.get_draw_data())
 
     def setup_key_map(self):
-        io = imgui.get_io()
+        io = self.io
         keys = (
             imgui.KEY_TAB,
             imgui.KEY_LEFT_ARROW,
@@ -439,13 +463,16 @@ class GlobalImgui:
             # because imgui requires the key_map to contain integers only
             io.key_map[k] = k
 
+
+_GLOBAL = GlobalImgui()
+
 # -------------------------------------------------------------------
 
 def imgui_handler_add(callback, SpaceType):
-    return GlobalImgui.get().handler_add(callback, SpaceType)
+    return _GLOBAL.handler_add(callback, SpaceType)
 
 def imgui_handler_remove(handle):
-    GlobalImgui.get().handler_remove(handle)
+    _GLOBAL.handler_remove(handle)
 
 # -------------------------------------------------------------------
 
@@ -480,11 +507,26 @@ class ImguiBasedOperator:
         'RIGHT_SHIFT': 128 + 6,
         'OSKEY': 128 + 7,
     }
+    # Resolved once here rather than at each event
+    _LEFT_CTRL = key_map['LEFT_CTRL']
+    _RIGHT_CTRL = key_map['RIGHT_CTRL']
+    _LEFT_ALT = key_map['LEFT_ALT']
+    _RIGHT_ALT = key_map['RIGHT_ALT']
+    _LEFT_SHIFT = key_map['LEFT_SHIFT']
+    _RIGHT_SHIFT = key_map['RIGHT_SHIFT']
+    _OSKEY = key_map['OSKEY']
+    _MOUSE_BUTTONS = {
+        'LEFTMOUSE': 0,
+        'RIGHTMOUSE': 1,
+        'MIDDLEMOUSE': 2,
+    }
     def init_imgui(self, context):
         self.imgui_handle = imgui_handler_add(self.draw, SpaceView3D)
         
     def shutdown_imgui(self):
         imgui_handler_remove(self.imgui_handle)
+        # The context may be destroyed with our handler, forget its io
+        self.imgui_io = None
 
     def draw(self, context):
         # This is where you can use any code from pyimgui's doc
@@ -493,18 +535,17 @@ class ImguiBasedOperator:
 
     def modal_imgui(self, context, event):
         region = context.region
-        io = imgui.get_io()
+        # The io object is stable for the lifetime of the imgui context,
+        # fetch it on the first event only.
+        io = getattr(self, "imgui_io", None)
+        if io is None:
+            io = self.imgui_io = imgui.get_io()
         
         io.mouse_pos = (event.mouse_region_x, region.height - 1 - event.mouse_region_y)
 
-        if event.type == 'LEFTMOUSE':
-            io.mouse_down[0] = event.value == 'PRESS'
-
-        elif event.type == 'RIGHTMOUSE':
-            io.mouse_down[1] = event.value == 'PRESS'
-
-        elif event.type == 'MIDDLEMOUSE':
-            io.mouse_down[2] = event.value == 'PRESS'
+        button = self._MOUSE_BUTTONS.get(event.type)
+        if button is not None:
+            io.mouse_down[button] = event.value == 'PRESS'
 
         elif event.type == 'WHEELUPMOUSE':
             io.mouse_wheel = -1
@@ -514,28 +555,18 @@ class ImguiBasedOperator:
 
         print(f"Event type={event.type}, unicode={event.unicode}")
 
-        if event.type in self.key_map:
+        key = self.key_map.get(event.type)
+        if key is not None:
             if event.value == 'PRESS':
-                io.keys_down[self.key_map[event.type]] = True
+                io.keys_down[key] = True
             elif event.value == 'RELEASE':
-                io.keys_down[self.key_map[event.type]] = False
-
-        io.key_ctrl = (
-            io.keys_down[self.key_map['LEFT_CTRL']] or
-            io.keys_down[self.key_map['RIGHT_CTRL']]
-        )
-
-        io.key_alt = (
-            io.keys_down[self.key_map['LEFT_ALT']] or
-            io.keys_down[self.key_map['RIGHT_ALT']]
-        )
-
-        io.key_shift = (
-            io.keys_down[self.key_map['LEFT_SHIFT']] or
-            io.keys_down[self.key_map['RIGHT_SHIFT']]
-        )
+                io.keys_down[key] = False
 
-        io.key_super = io.keys_down[self.key_map['OSKEY']]
+        keys_down = io.keys_down
+        io.key_ctrl = keys_down[self._LEFT_CTRL] or keys_down[self._RIGHT_CTRL]
+        io.key_alt = keys_down[self._LEFT_ALT] or keys_down[self._RIGHT_ALT]
+        io.key_shift = keys_down[self._LEFT_SHIFT] or keys_down[self._RIGHT_SHIFT]
+        io.key_super = keys_down[self._OSKEY]
 
         if event.unicode:
             char = ord(event.unicode)